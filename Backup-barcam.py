@@ -14,13 +14,19 @@ import platform
 import threading
 import pandas as pd
 import json
+import queue
 import shutil
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from PyQt5.QtWidgets import (
     QApplication, QLabel, QPushButton, QVBoxLayout, QHBoxLayout, QWidget, QFileDialog,
-    QComboBox, QMessageBox, QMainWindow, QLineEdit, QTabWidget, QCheckBox, QTableWidget,
-    QTableWidgetItem, QHeaderView
+    QComboBox, QMessageBox, QMainWindow, QLineEdit, QTabWidget, QCheckBox, QTableView,
+    QHeaderView
+)
+from PyQt5.QtCore import (
+    QTimer, Qt, QSize, QEvent, QObject, QThread, pyqtSignal, pyqtSlot, QAbstractTableModel,
+    QModelIndex
 )
-from PyQt5.QtCore import QTimer, Qt
 from PyQt5.QtGui import QImage, QPixmap
 
 # ---------- Barcode Decoders ----------
@@ -39,8 +45,189 @@ except Exception as e:
     DMTX_AVAILABLE = False
     print("pylibdmtx not available:", repr(e))
 
+# Qt 5.14+ can display OpenCV's BGR frames directly. Older versions wrap
+# them as RGB and swap channels on the downscaled preview instead.
+HAS_BGR888 = hasattr(QImage, "Format_BGR888")
+PREVIEW_FORMAT = QImage.Format_BGR888 if HAS_BGR888 else QImage.Format_RGB888
+
+# ---------- Settings Serialization ----------
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except Exception as e:
+    ORJSON_AVAILABLE = False
+    print("orjson not available, using json:", repr(e))
+
+if ORJSON_AVAILABLE:
+    json_loads, json_dumps = orjson.loads, orjson.dumps
+else:
+    json_loads = json.loads
+
+    def json_dumps(obj):
+        return json.dumps(obj).encode("utf-8")
+
+# ---------- Excel Export ----------
+try:
+    import xlsxwriter  # noqa: F401 (used through pandas' ExcelWriter)
+    XLSXWRITER_AVAILABLE = True
+except Exception as e:
+    XLSXWRITER_AVAILABLE = False
+    print("xlsxwriter not available, exporting with openpyxl:", repr(e))
+
+# ---------- Frame Fingerprints ----------
+# Both are single SIMD OpenCV calls on tiny images; a Numba prange version
+# only added thread-pool dispatch per call and a JIT stall on first use.
+def activity(a, b):
+    # Mean absolute difference between two grayscale thumbnails
+    return cv2.absdiff(a, b).mean()
+
+
+def phash_pack(small):
+    # 8x8 block means of a grayscale thumbnail, flattened to 64 bytes
+    return cv2.resize(small, (8, 8), interpolation=cv2.INTER_AREA).ravel()
+
+
+# Motion gate on a 160x90 grayscale thumbnail (mean absolute difference):
+# a frame is decoded only once the scene is stable (below STABLE_THRESHOLD
+# against the previous frame) and has changed since the last decode (at
+# least MOTION_THRESHOLD against the decoded frame).
+STABLE_THRESHOLD = 4.0
+MOTION_THRESHOLD = 2.0
+DECODE_CACHE_SIZE = 64
+
+
+class DecodeWorker(QObject):
+    """Runs the barcode decoders on its own QThread.
+
+    Frames are handed over through a one-slot queue; when the worker is
+    still busy the new frame is dropped, so decoding always works on a
+    recent frame and never backs up behind the camera.
+    """
+    barcode_found = pyqtSignal(bytes, float)
+
+    def __init__(self):
+        super().__init__()
+        self.frames = queue.Queue(maxsize=1)
+        self._running = True
+        # Decode results keyed by an 8x8 grayscale fingerprint of the frame;
+        # each entry keeps its thumbnail to rule out fingerprint collisions
+        self._decode_cache = OrderedDict()
+        self._prev_small = None
+        self._decoded_small = None
+        self._last_codes = []
+
+    def submit(self, frame):
+        try:
+            self.frames.put_nowait(frame)
+        except queue.Full:
+            pass
+
+    def stop(self):
+        self._running = False
+
+    @pyqtSlot()
+    def run(self):
+        emitted = []
+        while self._running:
+            try:
+                frame = self.frames.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            codes = self.decode_barcodes(frame)
+            if codes != emitted:
+                now = time.time()
+                for code in codes:
+                    self.barcode_found.emit(code, now)
+                emitted = codes
+
+    def decode_barcodes(self, frame):
+        small = cv2.cvtColor(
+            cv2.resize(frame, (160, 90), interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2GRAY
+        )
+        prev, self._prev_small = self._prev_small, small
+        if prev is not None and activity(small, prev) >= STABLE_THRESHOLD:
+            return self._last_codes
+        if (self._decoded_small is not None
+                and activity(small, self._decoded_small) < MOTION_THRESHOLD):
+            return self._last_codes
+
+        key = phash_pack(small).tobytes()
+        entry = self._decode_cache.get(key)
+        # two different codes at the same spot can share the 8x8 block means,
+        # so a hit only counts if the full thumbnail matches as well
+        if entry is not None and activity(small, entry[0]) < MOTION_THRESHOLD:
+            codes = entry[1]
+            self._decode_cache.move_to_end(key)
+        else:
+            codes = self._run_decoders(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))
+            if codes:
+                self._decode_cache[key] = (small, codes)
+                self._decode_cache.move_to_end(key)
+                if len(self._decode_cache) > DECODE_CACHE_SIZE:
+                    self._decode_cache.popitem(last=False)
+        self._last_codes = codes
+        # only a successful decode pins the scene; an empty result is retried
+        # on the next steady frame instead of waiting for more motion
+        self._decoded_small = small if codes else None
+        return codes
+
+    def _run_decoders(self, gray):
+        codes = []
+        if PYZBAR_AVAILABLE:
+            codes = [sym.data for sym in pyzbar.decode(gray)]
+        if not codes and DMTX_AVAILABLE:
+            codes = [sym.data for sym in dmtx_decode(gray, timeout=100)]
+        return codes
+
+
+class SKUModel(QAbstractTableModel):
+    """Scanned SKUs stored as two parallel lists instead of table items."""
+    HEADERS = ("Timestamp", "SKU")
+
+    def __init__(self):
+        super().__init__()
+        self.timestamps = []
+        self.skus = []
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.skus)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid():
+            return None
+        if index.column() == 0:
+            return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.timestamps[index.row()]))
+        return self.skus[index.row()]
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def add_rows(self, rows):
+        first = len(self.skus)
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        for ts, sku in rows:
+            self.timestamps.append(ts)
+            self.skus.append(sku)
+        self.endInsertRows()
+
+    def clear(self):
+        self.beginResetModel()
+        self.timestamps.clear()
+        self.skus.clear()
+        self.endResetModel()
+
 
 class BarcodeApp(QMainWindow):
+    # (path, error) emitted from the export thread; error is "" on success
+    export_done = pyqtSignal(str, str)
+    # (filename, error) emitted from the snapshot I/O thread
+    snapshot_saved = pyqtSignal(str, str)
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Barcode Inspector")
@@ -52,15 +239,52 @@ class BarcodeApp(QMainWindow):
         self.load_settings()
 
         # Camera and serial
+        self._cv_backend = {
+            "Linux": cv2.CAP_V4L2,
+            "Windows": cv2.CAP_DSHOW,
+        }.get(platform.system(), cv2.CAP_ANY)
         self.capture = None
         self.timer = QTimer()
         self.timer.timeout.connect(self.update_frame)
+        # New SKU rows are staged and added to the table in one batch
+        self._pending_rows = []
+        self._flush_timer = QTimer()
+        self._flush_timer.timeout.connect(self._flush_rows)
         self.camera_index = None
         self.last_barcode = None
         self.barcode_set = set()
         self.save_location = ""
         self.serial_port = None
 
+        # Capture thread state: the producer overwrites a single slot, the
+        # GUI timer only picks up whatever frame is newest.
+        self._frame_lock = threading.Lock()
+        self._latest_frame = None
+        self._capture_thread = None
+        self._running = False
+        # Set by the GUI when it wants a new frame; until then the capture
+        # thread only grab()s and never pays for decoding.
+        self._frame_wanted = threading.Event()
+        # Two preallocated frame buffers: the capture thread retrieves into
+        # one while the GUI still holds the other. Each has a QImage wrapping
+        # its memory, built once per buffer rather than once per frame.
+        self._frame_bufs = []
+        self._qimages = []
+        self._buf_index = 0
+        # QImage wraps frame memory without copying; keep the frame alive
+        # until the next one replaces it.
+        self._current_frame = None
+        # Preview size is only recomputed when the label or frame size changes
+        self._preview_key = None
+        self._preview_size = None
+        self._decode_worker = None
+        self._decode_thread = None
+
+        # Snapshots are JPEG-encoded and written off the GUI thread
+        self._io_queue = queue.Queue()
+        self._io_thread = threading.Thread(target=self._io_loop, daemon=True)
+        self._io_thread.start()
+
         self.init_ui()
         self.populate_serial_ports()
         self.populate_camera_indices()
@@ -83,6 +307,9 @@ class BarcodeApp(QMainWindow):
         self.image_label = QLabel("Camera Feed")
         self.image_label.setAlignment(Qt.AlignCenter)
         self.image_label.setMinimumSize(640, 480)
+        # Label size is cached here and refreshed from its resize events
+        self._label_size = self.image_label.size()
+        self.image_label.installEventFilter(self)
 
         self.barcode_label = QLabel("Current Barcode: None")
         self.count_label = QLabel("Unique SKUs Scanned: 0")
@@ -103,11 +330,11 @@ class BarcodeApp(QMainWindow):
         self.status_label = QLabel("Status: Initializing...")
 
         # Table
-        self.sku_table = QTableWidget()
-        self.sku_table.setColumnCount(2)
-        self.sku_table.setHorizontalHeaderLabels(["Timestamp", "SKU"])
+        self.sku_model = SKUModel()
+        self.sku_table = QTableView()
+        self.sku_table.setModel(self.sku_model)
         self.sku_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-        self.sku_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.sku_table.setEditTriggers(QTableView.NoEditTriggers)
 
         controls_layout = QVBoxLayout()
         controls_layout.addWidget(QLabel("Select Serial Port:"))
@@ -167,24 +394,27 @@ class BarcodeApp(QMainWindow):
         self.select_folder_button.clicked.connect(self.select_folder)
         self.export_button.clicked.connect(self.export_to_excel)
         self.save_settings_button.clicked.connect(self.save_settings)
+        self.export_done.connect(self._on_export_done)
+        self.snapshot_saved.connect(self._on_snapshot_saved)
 
     # ------------------------ Camera ------------------------
     def _get_backend(self):
-        if platform.system() == "Linux":
-            return cv2.CAP_V4L2
-        if platform.system() == "Windows":
-            return cv2.CAP_DSHOW
-        return cv2.CAP_ANY
+        return self._cv_backend
 
     def detect_cameras(self, max_test=5):
-        found = []
         backend = self._get_backend()
-        for i in range(max_test):
+
+        # Opening a device blocks in the driver with the GIL released, so
+        # every index can be probed at the same time.
+        def probe(i):
             cap = cv2.VideoCapture(i, backend)
-            if cap.isOpened():
-                found.append(str(i))
-                cap.release()
-        return found
+            opened = cap.isOpened()
+            cap.release()
+            return i, opened
+
+        with ThreadPoolExecutor(max_workers=max_test) as pool:
+            results = pool.map(probe, range(max_test))
+        return [str(i) for i, opened in sorted(results) if opened]
 
     def populate_camera_indices(self):
         self.camera_combo.clear()
@@ -201,16 +431,23 @@ class BarcodeApp(QMainWindow):
     def _open_camera(self, idx):
         backend = self._get_backend()
         cap = cv2.VideoCapture(idx, backend)
-        if cap and cap.isOpened():
-            return cap
-        # fallback
-        cap.release()
-        cap = cv2.VideoCapture(idx)
-        if cap and cap.isOpened():
-            return cap
-        return None
+        if not (cap and cap.isOpened()):
+            # fallback
+            cap.release()
+            cap = cv2.VideoCapture(idx)
+            if not (cap and cap.isOpened()):
+                return None
+        # Keep only the newest frame in the driver queue and ask for MJPG,
+        # which must be requested before the resolution is set.
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*"MJPG"))
+        return cap
 
     def start_camera(self):
+        if self.capture:
+            # already running: a second start would run two capture loops on
+            # one device and drop the decoder QThread while it still runs
+            return
         selected = self.camera_combo.currentText()
         index = int(selected) if selected.isdigit() else 0
         cap = self._open_camera(index)
@@ -221,49 +458,158 @@ class BarcodeApp(QMainWindow):
         self.capture = cap
         self.capture.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
         self.capture.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
+        w = int(self.capture.get(cv2.CAP_PROP_FRAME_WIDTH)) or 1280
+        h = int(self.capture.get(cv2.CAP_PROP_FRAME_HEIGHT)) or 720
+        self._alloc_frame_buffers(h, w)
+        self._start_decoder()
+        self._running = True
+        self._frame_wanted.set()
+        self._capture_thread = threading.Thread(target=self._capture_loop, daemon=True)
+        self._capture_thread.start()
         self.timer.start(30)
+        self._flush_timer.start(200)
         self.status_label.setText(f"Status: Camera started (index {index})")
 
     def stop_camera(self):
         self.timer.stop()
+        self._flush_timer.stop()
+        self._running = False
+        if self._capture_thread:
+            self._capture_thread.join(timeout=1.0)
+            self._capture_thread = None
+        with self._frame_lock:
+            self._latest_frame = None
+        self._stop_decoder()
+        self._flush_rows()
         if self.capture:
             self.capture.release()
             self.capture = None
         self.image_label.setText("Camera Feed")
         self.status_label.setText("Status: Camera stopped")
 
+    def closeEvent(self, event):
+        # the decoder QThread must finish and the capture thread let go of the
+        # device before the window is destroyed
+        self.stop_camera()
+        super().closeEvent(event)
+
+    def _start_decoder(self):
+        self._decode_worker = DecodeWorker()
+        self._decode_thread = QThread()
+        self._decode_worker.moveToThread(self._decode_thread)
+        self._decode_thread.started.connect(self._decode_worker.run)
+        self._decode_worker.barcode_found.connect(self.on_barcode_found)
+        self._decode_thread.start()
+
+    def _stop_decoder(self):
+        if self._decode_worker:
+            self._decode_worker.stop()
+            self._decode_thread.quit()
+            self._decode_thread.wait()
+            self._decode_worker = None
+            self._decode_thread = None
+
+    def _alloc_frame_buffers(self, h, w):
+        bufs = [np.empty((h, w, 3), dtype=np.uint8) for _ in range(2)]
+        self._qimages = [QImage(buf.data, w, h, 3 * w, PREVIEW_FORMAT) for buf in bufs]
+        self._frame_bufs = bufs
+        self._buf_index = 0
+
+    def _capture_loop(self):
+        while self._running:
+            if not self.capture.grab():
+                time.sleep(0.01)
+                continue
+            if not self._frame_wanted.is_set():
+                continue
+            buf = self._frame_bufs[self._buf_index]
+            ret, frame = self.capture.retrieve(buf)
+            if not ret or frame is None:
+                continue
+            if frame is not buf:
+                # Resolution differs from the buffers; OpenCV allocated anew
+                self._alloc_frame_buffers(*frame.shape[:2])
+                np.copyto(self._frame_bufs[0], frame)
+            published = (self._frame_bufs[self._buf_index], self._qimages[self._buf_index])
+            self._buf_index ^= 1
+            self._frame_wanted.clear()
+            with self._frame_lock:
+                self._latest_frame = published
+
+    def eventFilter(self, obj, event):
+        if obj is self.image_label and event.type() == QEvent.Resize:
+            self._label_size = QSize(event.size())
+        return super().eventFilter(obj, event)
+
     # ------------------------ Frame Update ------------------------
     def update_frame(self):
-        if not self.capture:
+        with self._frame_lock:
+            latest = self._latest_frame
+            self._latest_frame = None
+        if latest is None:
+            return
+        self._frame_wanted.set()
+        frame, qt_image = latest
+        self._current_frame = frame
+        key = (self._label_size.width(), self._label_size.height(), frame.shape)
+        if key != self._preview_key:
+            self._preview_key = key
+            self._preview_size = qt_image.size().scaled(self._label_size, Qt.KeepAspectRatio)
+        preview = qt_image.scaled(self._preview_size, Qt.IgnoreAspectRatio, Qt.FastTransformation)
+        if not HAS_BGR888:
+            preview = preview.rgbSwapped()
+        self.image_label.setPixmap(QPixmap.fromImage(preview))
+        # The capture thread will reuse this buffer, so the worker gets a
+        # copy, and only when it is ready to take one.
+        if self._decode_worker and self._decode_worker.frames.empty():
+            self._decode_worker.submit(frame.copy())
+
+    def on_barcode_found(self, code, ts):
+        # Codes stay raw bytes; text is only decoded for display
+        if code == self.last_barcode:
             return
-        ret, frame = self.capture.read()
-        if not ret or frame is None:
+        self.last_barcode = code
+        text = code.decode("utf-8", "replace")
+        self.barcode_label.setText(f"Current Barcode: {text}")
+        if code in self.barcode_set:
             return
-        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        h, w, ch = rgb.shape
-        bytes_per_line = ch * w
-        qt_image = QImage(rgb.data, w, h, bytes_per_line, QImage.Format_RGB888)
-        self.image_label.setPixmap(QPixmap.fromImage(qt_image).scaled(
-            self.image_label.width(), self.image_label.height(),
-            Qt.KeepAspectRatio, Qt.SmoothTransformation
-        ))
+        self.barcode_set.add(code)
+        self._pending_rows.append((ts, text))
+        if not self._flush_timer.isActive():
+            # delivered after stop_camera; no batch is coming
+            self._flush_rows()
+        if self.settings.get("beep_enabled", True):
+            QApplication.beep()
+
+    def _flush_rows(self):
+        if not self._pending_rows:
+            return
+        rows, self._pending_rows = self._pending_rows, []
+        self.sku_model.add_rows(rows)
+        self.count_label.setText(f"Unique SKUs Scanned: {len(self.barcode_set)}")
+
+    def clear_session(self):
+        self._pending_rows = []
+        self.barcode_set.clear()
+        self.last_barcode = None
+        self.sku_model.clear()
+        self.barcode_label.setText("Current Barcode: None")
+        self.count_label.setText("Unique SKUs Scanned: 0")
 
     # ------------------------ Helpers ------------------------
     def load_settings(self):
-        if os.path.exists(self.settings_file):
-            try:
-                with open(self.settings_file, "r") as f:
-                    self.settings = json.load(f)
-            except:
-                self.settings = {}
-        else:
+        try:
+            with open(self.settings_file, "rb") as f:
+                self.settings = json_loads(f.read())
+        except (ValueError, OSError):
+            # missing (FileNotFoundError), unreadable or malformed file
             self.settings = {}
 
     def save_settings(self):
         self.settings["beep_enabled"] = self.beep_checkbox.isChecked()
         self.settings["theme"] = self.theme_combo.currentText()
-        with open(self.settings_file, "w") as f:
-            json.dump(self.settings, f)
+        with open(self.settings_file, "wb") as f:
+            f.write(json_dumps(self.settings))
         self.set_stylesheet()
 
     def set_stylesheet(self):
@@ -282,16 +628,84 @@ class BarcodeApp(QMainWindow):
     def show_error(self, msg):
         QMessageBox.critical(self, "Error", msg)
 
+    def select_folder(self):
+        folder = QFileDialog.getExistingDirectory(self, "Select Save Folder")
+        if folder:
+            self.save_location = folder
+
     def capture_snapshot(self):
         if self.capture:
-            ret, frame = self.capture.read()
-            if ret:
-                filename = os.path.join(os.getcwd(), f"snapshot_{int(time.time())}.jpg")
-                cv2.imwrite(filename, frame)
-                QMessageBox.information(self, "Snapshot", f"Saved {filename}")
+            # Reuse the frame on screen; the capture thread owns the device
+            frame = self._current_frame
+            if frame is not None:
+                folder = self.save_location or os.getcwd()
+                filename = os.path.join(folder, f"snapshot_{int(time.time())}.jpg")
+                self._io_queue.put((filename, frame.copy()))
             else:
                 self.show_error("Failed to capture snapshot")
 
+    def _io_loop(self):
+        while True:
+            filename, frame = self._io_queue.get()
+            try:
+                ok, buf = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 90])
+                if not ok:
+                    raise ValueError("JPEG encoding failed")
+                with open(filename, "wb") as f:
+                    f.write(buf)
+            except Exception as e:
+                self.snapshot_saved.emit(filename, str(e))
+                continue
+            self.snapshot_saved.emit(filename, "")
+
+    def _on_snapshot_saved(self, filename, error):
+        if error:
+            self.show_error(f"Failed to save snapshot: {error}")
+        else:
+            QMessageBox.information(self, "Snapshot", f"Saved {filename}")
+
+    # ------------------------ Export ------------------------
+    def export_to_excel(self):
+        if not self.sku_model.skus:
+            self.show_error("No scanned SKUs to export")
+            return
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Export Scanned SKUs", "barcode_log.xlsx",
+            "Excel Workbook (*.xlsx);;CSV (*.csv)"
+        )
+        if not path:
+            return
+        df = pd.DataFrame({
+            "Timestamp": [time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(ts))
+                          for ts in self.sku_model.timestamps],
+            "SKU": list(self.sku_model.skus),
+        })
+        self.export_button.setEnabled(False)
+        threading.Thread(target=self._write_export, args=(df, path), daemon=True).start()
+
+    def _write_export(self, df, path):
+        try:
+            if path.lower().endswith(".csv"):
+                df.to_csv(path, index=False)
+            elif XLSXWRITER_AVAILABLE:
+                # constant_memory streams rows to disk instead of holding the workbook
+                with pd.ExcelWriter(path, engine="xlsxwriter",
+                                    engine_kwargs={"options": {"constant_memory": True}}) as writer:
+                    df.to_excel(writer, index=False)
+            else:
+                df.to_excel(path, index=False)
+        except Exception as e:
+            self.export_done.emit(path, str(e))
+            return
+        self.export_done.emit(path, "")
+
+    def _on_export_done(self, path, error):
+        self.export_button.setEnabled(True)
+        if error:
+            self.show_error(f"Failed to export: {error}")
+        else:
+            QMessageBox.information(self, "Export", f"Exported to {path}")
+
 # ------------------------ Main ------------------------
 def main():
     app = QApplication(sys.argv)
@@ -7,19 +7,192 @@ import numpy as np
 import serial.tools.list_ports
 import platform
 import threading
-import pandas as pd
 import json
+import csv
+import queue
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from PyQt5.QtWidgets import (
     QApplication, QLabel, QPushButton, QVBoxLayout, QHBoxLayout, QWidget, QFileDialog,
-    QComboBox, QMessageBox, QMainWindow, QLineEdit, QTabWidget, QCheckBox, QTableWidget,
-    QTableWidgetItem, QHeaderView
+    QComboBox, QMessageBox, QMainWindow, QLineEdit, QTabWidget, QCheckBox, QTableView,
+    QHeaderView, QSpinBox
 )
-from PyQt5.QtCore import QTimer, Qt
+from PyQt5.QtCore import QThread, Qt, pyqtSignal, QAbstractTableModel, QModelIndex
 from PyQt5.QtGui import QImage, QPixmap
 from pyzbar import pyzbar
-from pyzbar.pyzbar import ZBarSymbol
-from pylibdmtx.pylibdmtx import decode as dmtx_decode
+
+# Barcodes are decoded on a grayscale copy downscaled by this factor;
+# detected coordinates are scaled back up for drawing on the full frame.
+DECODE_SCALE = 2
+
+
+# "Expected symbology" presets in the Settings tab -> ZBarSymbol names.
+# Every enabled symbology costs zbar work on each scan line, so restricting
+# the set to what the current order uses speeds decoding up.
+SYMBOLOGY_PRESETS = {
+    "All": ("EAN13", "CODE128", "QRCODE"),
+    "EAN13 only": ("EAN13",),
+    "CODE128 only": ("CODE128",),
+    "QR only": ("QRCODE",),
+}
+
+# Qt 5.14+ can display OpenCV's BGR frames directly. Older versions wrap
+# them as RGB and swap channels on the downscaled preview instead.
+HAS_BGR888 = hasattr(QImage, "Format_BGR888")
+PREVIEW_FORMAT = QImage.Format_BGR888 if HAS_BGR888 else QImage.Format_RGB888
+
+# Result of OpenCV's native detector, shaped like the pyzbar fields used here
+NativeBarcode = namedtuple("NativeBarcode", ["data", "polygon"])
+# cv2.barcode result types -> the ZBarSymbol name zbar reports them under
+# (zbar returns UPC-A as EAN-13); cv2.barcode only knows EAN/UPC codes
+NATIVE_TO_ZBAR = {"EAN_13": "EAN13", "UPC_A": "EAN13", "EAN_8": "EAN8", "UPC_E": "UPCE"}
+
+
+# Default JPEG quality for saved barcode images (Settings -> "JPEG quality")
+DEFAULT_JPEG_QUALITY = 80
+# Max CSV rows written by the background writer per open/append
+CSV_BATCH_ROWS = 32
+
+# Platform checks and the preferred capture backend are fixed for the
+# process, so resolve them once at import
+_IS_WINDOWS = platform.system() == "Windows"
+_IS_LINUX = platform.system() == "Linux"
+if _IS_LINUX:
+    _PREFERRED_BACKEND = getattr(cv2, "CAP_V4L2", 0)
+elif _IS_WINDOWS:
+    _PREFERRED_BACKEND = getattr(cv2, "CAP_DSHOW", 0)
+else:
+    # macOS or others: use default
+    _PREFERRED_BACKEND = 0
+
+
+class CameraProducer(QThread):
+    """
+    Reads frames from an opened cv2.VideoCapture on its own thread so the
+    GUI thread never blocks on the camera driver.
+    Every frame is grab()bed to keep the driver queue drained, but a frame is
+    only retrieve()d (decoded) when the single "latest frame" slot is empty,
+    i.e. when the GUI has taken the previous one. Frames grabbed while the
+    GUI is busy are dropped without being decoded, and the next retrieve()
+    returns the newest grabbed frame, so there is never a backlog. The
+    trade-off against decoding and overwriting every frame: the slot frame
+    can be up to one frame interval older than the newest one by the time
+    the GUI gets to it. frame_ready fires when the slot fills; the consumer
+    empties it with take_latest().
+    """
+    frame_ready = pyqtSignal()
+    camera_lost = pyqtSignal()
+
+    def __init__(self, cap, parent=None):
+        super().__init__(parent)
+        self.cap = cap
+        self._active = True
+        self._latest_frame = None
+        self._latest_lock = threading.Lock()
+
+    def run(self):
+        while self._active:
+            try:
+                ok = self.cap.grab()
+                if ok and self._latest_frame is not None:
+                    continue  # GUI still holds a frame: drop this one undecoded
+                ret, frame = self.cap.retrieve() if ok else (False, None)
+            except Exception:
+                ret, frame = False, None
+            if not ret or frame is None:
+                if self._active:
+                    self.camera_lost.emit()
+                return
+            with self._latest_lock:
+                self._latest_frame = frame
+            self.frame_ready.emit()
+
+    def take_latest(self):
+        with self._latest_lock:
+            frame = self._latest_frame
+            self._latest_frame = None
+        return frame
+
+    def stop(self):
+        self._active = False
+        self.wait()
+
+
+class DeviceProber(QThread):
+    """
+    Runs a slow device enumeration (camera or serial port probing) off the
+    GUI thread and emits the resulting list through found_signal.
+    """
+    found_signal = pyqtSignal(list)
+
+    def __init__(self, probe, parent=None):
+        super().__init__(parent)
+        self._probe = probe
+        self.found = None  # result, once run() has finished
+
+    def run(self):
+        try:
+            found = self._probe()
+        except Exception:
+            found = []
+        self.found = found
+        self.found_signal.emit(found)
+
+
+class SkuTableModel(QAbstractTableModel):
+    """
+    Model behind the scanned-SKU table: a plain list of (timestamp, sku)
+    tuples. The view only asks for the rows it shows, so no widget item is
+    created per scan.
+    """
+    HEADERS = ("Timestamp", "SKU")
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows = []
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and index.isValid():
+            return str(self._rows[index.row()][index.column()])
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def append(self, timestamp, sku):
+        row = len(self._rows)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._rows.append((timestamp, sku))
+        self.endInsertRows()
+
+    def set_rows(self, rows):
+        self.beginResetModel()
+        self._rows = list(rows)
+        self.endResetModel()
+
+
 class BarcodeApp(QMainWindow):
+    _DARK_QSS = """
+        QWidget { background-color: #121212; color: white; }
+        QPushButton { font-size: 14px; padding: 6px; border-radius: 5px; }
+        QLabel, QComboBox, QLineEdit { color: white; font-size: 16px; }
+        QTableView { background-color: #1e1e1e; color: white; gridline-color: gray; }
+    """
+    _LIGHT_QSS = """
+        QWidget { background-color: white; color: black; }
+        QPushButton { font-size: 14px; padding: 6px; border-radius: 5px; }
+        QLabel, QComboBox, QLineEdit { color: black; font-size: 16px; }
+        QTableView { background-color: #f0f0f0; color: black; gridline-color: gray; }
+    """
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Barcode Inspector")
@@ -30,13 +203,42 @@ class BarcodeApp(QMainWindow):
 
         # Core variables
         self.capture = None
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_frame)
+        self.producer = None
+        self.last_frame = None
+        self._frame_counter = 0
+        self._last_barcodes = []  # reused on frames that skip decoding
+        # Order folder and CSV log path, resolved once per camera session
+        self._order_folder = None
+        self._log_path = None
+        # Reused per-frame buffers for the decode path (sized in start_camera)
+        self._gray_buf = None
+        self._small_buf = None
+
+        # OpenCV's native 1D detector is tried before pyzbar when available
+        # (cv2.barcode is in contrib builds before 4.8 and in main from 4.8)
+        self._cv_barcode = None
+        if hasattr(cv2, "barcode"):
+            try:
+                self._cv_barcode = cv2.barcode.BarcodeDetector()
+            except Exception:
+                self._cv_barcode = None
+
+        # Symbologies passed to pyzbar, resolved from settings once (and on save)
+        self._zbar_symbols = []
+        self._native_symbols = set()
+        self._update_zbar_symbols()
         self.camera_index = None
         self.last_barcode = None
         self.barcode_set = set()  # Store scanned SKUs
         self.save_location = ""
         self.serial_port = None
+        self._camera_prober = None
+        self._serial_prober = None
+        self._start_pending = False  # Start clicked while cameras were probed
+
+        # Image encoding and CSV logging run on a background writer thread
+        self._write_q = queue.Queue(maxsize=64)
+        threading.Thread(target=self._writer_loop, daemon=True).start()
 
         # Button colors
         self.button_colors = {
@@ -51,6 +253,7 @@ class BarcodeApp(QMainWindow):
         self.init_ui()
         self.populate_serial_ports()
         self.populate_camera_indices()
+        self._current_theme = None
         self.set_stylesheet()
 
     # ------------------------ UI Setup ------------------------
@@ -89,12 +292,12 @@ class BarcodeApp(QMainWindow):
         self.status_label = QLabel("Status: Not Connected")
 
         # Table for scanned SKUs
-        self.sku_table = QTableWidget()
-        self.sku_table.setColumnCount(2)
-        self.sku_table.setHorizontalHeaderLabels(["Timestamp", "SKU"])
+        self.sku_model = SkuTableModel(self)
+        self.sku_table = QTableView()
+        self.sku_table.setModel(self.sku_model)
         self.sku_table.horizontalHeader().setStretchLastSection(True)
         self.sku_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-        self.sku_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.sku_table.setEditTriggers(QTableView.NoEditTriggers)
 
         # Layouts
         controls_layout = QVBoxLayout()
@@ -143,6 +346,30 @@ class BarcodeApp(QMainWindow):
         settings_layout.addWidget(QLabel("Theme:"))
         settings_layout.addWidget(self.theme_combo)
 
+        self.symbology_combo = QComboBox()
+        self.symbology_combo.addItems(list(SYMBOLOGY_PRESETS))
+        self.symbology_combo.setCurrentText(self.settings.get("symbology", "All"))
+        settings_layout.addWidget(QLabel("Expected symbology:"))
+        settings_layout.addWidget(self.symbology_combo)
+
+        # Audit snapshots don't need libjpeg's Q95 default; lower quality
+        # encodes faster and writes smaller files
+        self.jpeg_quality_spin = QSpinBox()
+        self.jpeg_quality_spin.setRange(10, 100)
+        self.jpeg_quality_spin.setValue(int(self.settings.get("jpeg_quality", DEFAULT_JPEG_QUALITY)))
+        settings_layout.addWidget(QLabel("JPEG quality:"))
+        settings_layout.addWidget(self.jpeg_quality_spin)
+
+        self.mjpg_checkbox = QCheckBox("Request MJPG from camera")
+        self.mjpg_checkbox.setChecked(self.settings.get("mjpg_enabled", True))
+        settings_layout.addWidget(self.mjpg_checkbox)
+
+        self.fps_spin = QSpinBox()
+        self.fps_spin.setRange(5, 60)
+        self.fps_spin.setValue(int(self.settings.get("camera_fps", 30)))
+        settings_layout.addWidget(QLabel("Camera FPS:"))
+        settings_layout.addWidget(self.fps_spin)
+
         self.save_settings_button = QPushButton("Save Settings")
         settings_layout.addWidget(self.save_settings_button)
 
@@ -193,54 +420,67 @@ class BarcodeApp(QMainWindow):
 
     # ------------------------ Camera & Serial ------------------------
     def populate_serial_ports(self):
-        ports = serial.tools.list_ports.comports()
+        # Enumerate in the background; the combo offers only "None" meanwhile
         self.serial_port_combo.clear()
         self.serial_port_combo.addItem("None")
-        for port in ports:
-            self.serial_port_combo.addItem(port.device)
         self.serial_port_combo.setCurrentText("None")
+        self._serial_prober = DeviceProber(
+            lambda: [port.device for port in serial.tools.list_ports.comports()], self)
+        self._serial_prober.found_signal.connect(self._on_serial_ports_found)
+        self._serial_prober.start()
+
+    def _on_serial_ports_found(self, ports):
+        self.serial_port_combo.addItems(ports)
 
     def _get_preferred_backend(self):
         """
         Return the preferable OpenCV backend flag for the current OS.
         On Linux prefer V4L2, on Windows prefer DSHOW, fallback to default (0).
         """
-        if platform.system() == "Linux":
-            return getattr(cv2, "CAP_V4L2", 0)
-        if platform.system() == "Windows":
-            return getattr(cv2, "CAP_DSHOW", 0)
-        # macOS or others: use default
-        return 0
+        return _PREFERRED_BACKEND
 
     def detect_cameras(self, max_test=8):
         """
         Scan camera indexes and return a list of available indexes (strings).
         Uses the preferred backend for the platform, then fallback to default.
         """
-        found = []
         backend = self._get_preferred_backend()
-        for index in range(max_test):
+
+        def probe(index):
             try:
                 if backend:
                     cap = cv2.VideoCapture(index, backend)
                 else:
                     cap = cv2.VideoCapture(index)
-                # small delay not necessary usually but some devices need time
                 if cap is not None and cap.isOpened():
-                    found.append(str(index))
                     cap.release()
+                    return True
             except Exception:
                 # ignore camera probe errors
                 pass
-        return found
+            return False
+
+        # each open blocks in the driver, so probe all indexes concurrently
+        with ThreadPoolExecutor(max_workers=max_test) as pool:
+            opened = list(pool.map(probe, range(max_test)))
+        return [str(index) for index, ok in enumerate(opened) if ok]
 
     def populate_camera_indices(self, max_test=8):
         """
         Populate the camera_combo with valid camera indices detected.
-        If none found, still add '0' so user can try manually.
+        Probing runs on a DeviceProber thread; _on_cameras_found fills the combo.
         """
         self.camera_combo.clear()
-        cameras = self.detect_cameras(max_test=max_test)
+        self.status_label.setText("Status: Detecting cameras...")
+        self._camera_prober = DeviceProber(lambda: self.detect_cameras(max_test=max_test), self)
+        self._camera_prober.found_signal.connect(self._on_cameras_found)
+        self._camera_prober.found_signal.connect(self._start_if_pending)
+        self._camera_prober.start()
+
+    def _on_cameras_found(self, cameras):
+        """
+        If none found, still add '0' so user can try manually.
+        """
         if cameras:
             self.camera_combo.addItems(cameras)
             # select first found by default
@@ -270,6 +510,8 @@ class BarcodeApp(QMainWindow):
                 else:
                     cap = cv2.VideoCapture(index)
                 if cap is not None and cap.isOpened():
+                    # keep only the newest frame in the driver queue
+                    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
                     return cap
                 # ensure release if opened false
                 if cap is not None:
@@ -292,7 +534,7 @@ class BarcodeApp(QMainWindow):
             return cap
 
         # 3) try DSHOW on Windows if preferred wasn't that
-        if platform.system() == "Windows":
+        if _IS_WINDOWS:
             fallback_backend = getattr(cv2, "CAP_DSHOW", None)
             if fallback_backend and fallback_backend != backend:
                 attempts.append(("dshow", fallback_backend))
@@ -301,7 +543,7 @@ class BarcodeApp(QMainWindow):
                     return cap
 
         # 4) try V4L2 on Linux if preferred wasn't that
-        if platform.system() == "Linux":
+        if _IS_LINUX:
             fallback_backend = getattr(cv2, "CAP_V4L2", None)
             if fallback_backend and fallback_backend != backend:
                 attempts.append(("v4l2", fallback_backend))
@@ -313,6 +555,20 @@ class BarcodeApp(QMainWindow):
         return None
 
     def start_camera(self):
+        if self.producer:
+            # already running: reopening would grab a second camera and
+            # drop the running CameraProducer QThread while it still runs
+            return
+
+        if self._camera_prober and self._camera_prober.found is None:
+            # the prober is opening the same devices; opening them here too
+            # would race it on the driver, so start once it reports back
+            # (_start_if_pending) rather than blocking the GUI on wait()
+            self._start_pending = True
+            self.start_button.setEnabled(False)
+            self.status_label.setText("Status: Waiting for camera detection...")
+            return
+
         serial_selection = self.serial_port_combo.currentText()
         if serial_selection is not None and serial_selection != "None":
             try:
@@ -337,8 +593,12 @@ class BarcodeApp(QMainWindow):
         if selected_text and selected_text.isdigit():
             use_index = int(selected_text)
         else:
-            # attempt to auto-find the first working camera
-            detected = self.detect_cameras(max_test=8)
+            # attempt to auto-find the first working camera, reusing the
+            # prober's result when it already ran
+            if self._camera_prober and self._camera_prober.found is not None:
+                detected = self._camera_prober.found
+            else:
+                detected = self.detect_cameras(max_test=8)
             if detected:
                 use_index = int(detected[0])
             else:
@@ -362,12 +622,23 @@ class BarcodeApp(QMainWindow):
 
         # success
         self.capture = cap
-        # set resolution (some cameras ignore this)
+        # MJPG lets USB 2.0 webcams run 720p at full rate (YUYV usually caps
+        # at 5-10 FPS); request it before the size so the mode is negotiated
+        # with the right pixel format. Set resolution (some cameras ignore this)
         try:
+            if self.settings.get("mjpg_enabled", True):
+                self.capture.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*"MJPG"))
             self.capture.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
             self.capture.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
+            self.capture.set(cv2.CAP_PROP_FPS, int(self.settings.get("camera_fps", 30)))
         except Exception:
             pass
+        try:
+            w = int(self.capture.get(cv2.CAP_PROP_FRAME_WIDTH)) or 1280
+            h = int(self.capture.get(cv2.CAP_PROP_FRAME_HEIGHT)) or 720
+        except Exception:
+            w, h = 1280, 720
+        self._alloc_decode_buffers(h, w)
 
         # store camera_index for reference
         try:
@@ -379,10 +650,25 @@ class BarcodeApp(QMainWindow):
         order_number = self.order_input.text().strip() or "NoOrder"
         if self.save_location:
             self.load_existing_barcodes(order_number)
+            self._resolve_order_folder()
 
-        self.timer.start(30)
+        self.producer = CameraProducer(self.capture)
+        self.producer.frame_ready.connect(self.update_frame, Qt.QueuedConnection)
+        self.producer.camera_lost.connect(self._on_camera_lost, Qt.QueuedConnection)
+        self.producer.start()
         self.status_label.setText(f"Status: Camera started (index {self.camera_index if self.camera_index is not None else 'unknown'})")
 
+    def _start_if_pending(self, _cameras):
+        """
+        Run a Start that was clicked while camera detection was running;
+        connected after _on_cameras_found so the combo is already filled.
+        """
+        if not self._start_pending:
+            return
+        self._start_pending = False
+        self.start_button.setEnabled(True)
+        self.start_camera()
+
     def _scan_and_open_any_camera(self, max_scan=8):
         """
         Scan indexes 0..max_scan-1 and try to open them until one succeeds.
@@ -404,7 +690,16 @@ class BarcodeApp(QMainWindow):
         return None
 
     def stop_camera(self):
-        self.timer.stop()
+        # Stop also cancels a Start still waiting on camera detection
+        self._start_pending = False
+        self.start_button.setEnabled(True)
+        if self.producer:
+            self.producer.stop()
+            self.producer = None
+        self.last_frame = None
+        self._last_barcodes = []
+        self._order_folder = self._log_path = None  # order number may change before the next start
+        self._write_q.put(None)  # close barcode_log.csv once pending rows are written
         if self.capture:
             try:
                 self.capture.release()
@@ -420,54 +715,97 @@ class BarcodeApp(QMainWindow):
         self.image_label.setText("Camera Feed")
         self.status_label.setText("Status: Disconnected")
 
+    def closeEvent(self, event):
+        self._start_pending = False
+        for prober in (self._camera_prober, self._serial_prober):
+            if prober:
+                prober.wait()
+        # the producer QThread must finish before the window is destroyed
+        if self.producer:
+            self.producer.stop()
+            self.producer = None
+        # let queued images and log rows reach the disk, then close the log
+        self._write_q.put(None)
+        self._write_q.join()
+        super().closeEvent(event)
+
     def select_folder(self):
         folder = QFileDialog.getExistingDirectory(self, "Select Save Folder")
         if folder:
             self.save_location = folder
+            self._order_folder = self._log_path = None
             QMessageBox.information(self, "Folder Selected", f"Save folder: {folder}")
 
+    def _on_camera_lost(self):
+        # camera stopped or returned empty frame
+        # stop and show error once
+        self.stop_camera()
+        self.show_error("Camera disconnected or returned no frames.")
+
     # ------------------------ Frame Processing ------------------------
     def update_frame(self):
-        if not self.capture:
+        if not self.capture or not self.producer:
             return
-        try:
-            ret, frame = self.capture.read()
-        except Exception:
-            ret = False
-            frame = None
-
-        if not ret or frame is None:
-            # camera stopped or returned empty frame
-            # stop and show error once
-            self.stop_camera()
-            self.show_error("Camera disconnected or returned no frames.")
+        frame = self.producer.take_latest()
+        if frame is None:
             return
+        self.last_frame = frame
 
-        # decode barcodes
-        try:
-            barcodes = pyzbar.decode(frame, symbols=[ZBarSymbol.EAN13, ZBarSymbol.CODE128, ZBarSymbol.QRCODE, ZBarSymbol.DATAMATRIX])
-        except Exception:
-            barcodes = []
+        # decode barcodes on every Nth frame only; the frames in between
+        # keep showing the last result so the overlay and label don't flicker
+        self._frame_counter += 1
+        if self._frame_counter % max(1, int(self.settings.get("decode_every_n", 3))) == 0:
+            # decode on a downscaled grayscale copy (1/6 of the bytes)
+            try:
+                if self._gray_buf is None or self._gray_buf.shape != frame.shape[:2]:
+                    # camera delivered a different size than negotiated
+                    self._alloc_decode_buffers(*frame.shape[:2])
+                cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=self._gray_buf)
+                small_h, small_w = self._small_buf.shape
+                cv2.resize(self._gray_buf, (small_w, small_h), dst=self._small_buf,
+                           interpolation=cv2.INTER_AREA)
+                barcodes = self._decode_native(self._small_buf) if self._native_symbols else []
+                if not barcodes:
+                    barcodes = pyzbar.decode(self._small_buf, symbols=self._zbar_symbols)
+            except Exception:
+                barcodes = []
+            self._last_barcodes = barcodes
+        else:
+            barcodes = self._last_barcodes
 
         current_barcode = None
 
+        # Decode text and build each outline once, then draw every outline of a
+        # colour with a single polylines call
+        detections = []
         for barcode in barcodes:
             try:
                 barcode_data = barcode.data.decode("utf-8").strip()
             except Exception:
                 continue
-            current_barcode = barcode_data
+            pts = np.asarray(barcode.polygon, np.int32).reshape(-1, 2)
+            pts *= DECODE_SCALE
+            detections.append((barcode_data, pts))
 
-            # draw polygon
-            try:
-                pts = np.array([barcode.polygon], np.int32)
-                color = (0, 0, 255) if barcode_data == self.last_barcode else (0, 255, 0)
-                cv2.polylines(frame, [pts], True, color, 3)
-                x, y, w, h = cv2.boundingRect(np.array(barcode.polygon))
-                cv2.putText(frame, barcode_data, (x, y - 10),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.8, color, 2)
-            except Exception:
-                pass
+        if detections:
+            # draw on a copy so last_frame stays clean for manual snapshots
+            frame = frame.copy()
+        try:
+            for repeat, color in ((True, (0, 0, 255)), (False, (0, 255, 0))):
+                labelled = [(data, pts) for data, pts in detections
+                            if len(pts) and (data == self.last_barcode) == repeat]
+                if not labelled:
+                    continue
+                cv2.polylines(frame, [pts for _, pts in labelled], True, color, 3)
+                for data, pts in labelled:
+                    x, y = pts.min(0)
+                    cv2.putText(frame, data, (int(x), int(y) - 10),
+                                cv2.FONT_HERSHEY_SIMPLEX, 0.8, color, 2)
+        except Exception:
+            pass
+
+        for barcode_data, _ in detections:
+            current_barcode = barcode_data
 
             sku_id = self.extract_sku(barcode_data)
             if sku_id not in self.barcode_set:
@@ -494,20 +832,57 @@ class BarcodeApp(QMainWindow):
         else:
             self.barcode_label.setText("Current Barcode: None")
 
-        # Convert frame to Qt format
+        # Convert frame to Qt format: wrap the BGR buffer as-is, no full-frame
+        # channel swap; QPixmap.fromImage copies it before frame goes away
         try:
-            rgb_image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            h, w, ch = rgb_image.shape
-            bytes_per_line = ch * w
-            qt_image = QImage(rgb_image.data, w, h, bytes_per_line, QImage.Format_RGB888)
-            scaled_image = QPixmap.fromImage(qt_image).scaled(
+            h, w = frame.shape[:2]
+            qt_image = QImage(frame.data, w, h, frame.strides[0], PREVIEW_FORMAT)
+            preview = qt_image.scaled(
                 self.image_label.width(), self.image_label.height(),
                 Qt.KeepAspectRatio, Qt.SmoothTransformation)
-            self.image_label.setPixmap(scaled_image)
+            if not HAS_BGR888:
+                preview = preview.rgbSwapped()
+            self.image_label.setPixmap(QPixmap.fromImage(preview))
         except Exception:
             # If conversion fails, just show placeholder text
             self.image_label.setText("Camera Feed - frame conversion failed")
 
+    def _decode_native(self, gray):
+        """
+        Decode with cv2.barcode if available. Returns NativeBarcode entries
+        (empty list if nothing was decoded) so the caller can fall back to pyzbar.
+        """
+        if self._cv_barcode is None:
+            return []
+        # OpenCV >= 4.8 moved the (ok, info, type, points) variant to detectAndDecodeWithType
+        detect = getattr(self._cv_barcode, "detectAndDecodeWithType", None) or self._cv_barcode.detectAndDecode
+        try:
+            ok, decoded_info, decoded_type, corners = detect(gray)
+        except Exception:
+            return []
+        if not ok or corners is None:
+            return []
+        # keep only the symbologies the Expected-symbology preset allows
+        return [
+            NativeBarcode(text.encode("utf-8"), [tuple(int(v) for v in pt) for pt in quad])
+            for text, kind, quad in zip(decoded_info, decoded_type, corners)
+            if text and NATIVE_TO_ZBAR.get(self._native_type_name(kind)) in self._native_symbols
+        ]
+
+    @staticmethod
+    def _native_type_name(kind):
+        # OpenCV >= 4.8 reports type names, older contrib builds BarcodeType ints
+        if isinstance(kind, str):
+            return kind.upper()
+        for name in NATIVE_TO_ZBAR:
+            if kind == getattr(cv2.barcode, name, None):
+                return name
+        return ""
+
+    def _alloc_decode_buffers(self, h, w):
+        self._gray_buf = np.empty((h, w), np.uint8)
+        self._small_buf = np.empty((h // DECODE_SCALE, w // DECODE_SCALE), np.uint8)
+
     # ------------------------ Core Logic ------------------------
     def extract_sku(self, barcode_value):
         try:
@@ -515,6 +890,16 @@ class BarcodeApp(QMainWindow):
         except Exception:
             return barcode_value
 
+    def _resolve_order_folder(self):
+        """
+        Resolve and create the order folder and log path once, so scans
+        don't pay for path joins and makedirs on every capture.
+        """
+        order_number = self.order_input.text().strip() or "NoOrder"
+        self._order_folder = os.path.join(self.save_location, order_number)
+        os.makedirs(self._order_folder, exist_ok=True)
+        self._log_path = os.path.join(self._order_folder, "barcode_log.csv")
+
     def capture_image(self, frame, sku_value):
         if not self.save_location:
             # if user didn't choose a folder, fallback to current working dir
@@ -522,39 +907,77 @@ class BarcodeApp(QMainWindow):
             # notify user once
             QMessageBox.information(self, "Save Folder", f"No folder selected — using {self.save_location}")
 
-        order_number = self.order_input.text().strip() or "NoOrder"
-        order_folder = os.path.join(self.save_location, order_number)
-        os.makedirs(order_folder, exist_ok=True)
+        if self._order_folder is None:
+            # no save folder when the camera started, or folder changed since
+            self._resolve_order_folder()
 
         timestamp = time.strftime("%Y%m%d-%H%M%S")
-        filename = os.path.join(order_folder, f"{sku_value}_{timestamp}.jpg")
-        try:
-            cv2.imwrite(filename, frame)
-        except Exception as e:
-            # save failed: show error but continue
-            print("Failed to write image:", e)
+        filename = os.path.join(self._order_folder, f"{sku_value}_{timestamp}.jpg")
+        # hand the JPEG encode and disk writes to the writer thread; the copy
+        # keeps later drawing on this frame out of the saved image
+        self._write_q.put((frame.copy(), filename, self._log_path, f"{timestamp},{sku_value}\n"))
 
         if self.settings.get("beep_enabled", True) and self.beep_checkbox.isChecked():
             self.play_sound(success=True)
 
-        log_path = os.path.join(order_folder, "barcode_log.csv")
-        file_exists = os.path.exists(log_path)
-        try:
-            with open(log_path, "a") as f:
-                if not file_exists:
-                    f.write("Timestamp,SKU\n")
-                f.write(f"{timestamp},{sku_value}\n")
-        except Exception as e:
-            print("Failed to write log:", e)
+    def _writer_loop(self):
+        # barcode_log.csv stays open for the session; None on the queue closes it
+        log_fh = None
+        while True:
+            batch = [self._write_q.get()]
+            # drain what is already queued so its CSV rows share one flush
+            while len(batch) < CSV_BATCH_ROWS:
+                try:
+                    batch.append(self._write_q.get_nowait())
+                except queue.Empty:
+                    break
+
+            for item in batch:
+                if item is None:
+                    if log_fh:
+                        log_fh.close()
+                        log_fh = None
+                    continue
+                frame, filename, log_path, row = item
+                try:
+                    quality = int(self.settings.get("jpeg_quality", DEFAULT_JPEG_QUALITY))
+                    ok, buf = cv2.imencode(".jpg", frame, [int(cv2.IMWRITE_JPEG_QUALITY), quality,
+                                                           int(cv2.IMWRITE_JPEG_OPTIMIZE), 0])
+                    if not ok:
+                        raise ValueError("JPEG encoding failed")
+                    with open(filename, "wb") as f:
+                        f.write(buf)
+                except Exception as e:
+                    # save failed: report but continue
+                    print("Failed to write image:", e)
+
+                try:
+                    if log_fh is None or log_fh.name != log_path:
+                        if log_fh:
+                            log_fh.close()
+                        file_exists = os.path.exists(log_path)
+                        log_fh = open(log_path, "a", buffering=8192)
+                        if not file_exists:
+                            log_fh.write("Timestamp,SKU\n")
+                    log_fh.write(row)
+                except Exception as e:
+                    print("Failed to write log:", e)
+
+            # one flush per batch keeps the log readable by export/reload
+            if log_fh:
+                try:
+                    log_fh.flush()
+                except Exception as e:
+                    print("Failed to write log:", e)
+
+            for _ in batch:
+                self._write_q.task_done()
 
     def capture_snapshot(self):
         if self.capture:
-            try:
-                ret, frame = self.capture.read()
-            except Exception:
-                ret = False
-                frame = None
-            if ret and frame is not None:
+            # the producer thread owns capture.read(); use the latest frame it delivered
+            frame = self.last_frame
+            if frame is not None:
                 self.capture_image(frame, "manual")
             else:
                 self.show_error("Failed to capture snapshot (camera not returning frames).")
@@ -567,16 +990,24 @@ class BarcodeApp(QMainWindow):
         order_number = self.order_input.text().strip() or "NoOrder"
         log_path = os.path.join(self.save_location, order_number, "barcode_log.csv")
         if os.path.exists(log_path) and os.path.getsize(log_path) > 0:
-            df = pd.read_csv(log_path)
-            if not df.empty:
-                excel_path = os.path.join(self.save_location, order_number, "barcode_log.xlsx")
-                try:
-                    df.to_excel(excel_path, index=False)
+            excel_path = os.path.join(self.save_location, order_number, "barcode_log.xlsx")
+            try:
+                import openpyxl  # deferred: only needed for export
+                # write_only streams rows to disk instead of building the sheet in memory
+                wb = openpyxl.Workbook(write_only=True)
+                ws = wb.create_sheet()
+                data_rows = 0
+                with open(log_path, newline="") as f:
+                    for row in csv.reader(f):
+                        ws.append(row)
+                        data_rows += 1
+                if data_rows > 1:  # more than the header line
+                    wb.save(excel_path)
                     QMessageBox.information(self, "Export", f"Log exported to {excel_path}")
                     return
-                except Exception as e:
-                    self.show_error(f"Failed to export to Excel: {e}")
-                    return
+            except Exception as e:
+                self.show_error(f"Failed to export to Excel: {e}")
+                return
         self.show_error("No valid barcode log to export")
 
     def clear_session(self):
@@ -585,21 +1016,18 @@ class BarcodeApp(QMainWindow):
         self.barcode_label.setText("Current Barcode: None")
         self.count_label.setText("Unique SKUs Scanned: 0")
         self.count_label.setStyleSheet("color: lime; font-weight: bold;")
-        self.sku_table.setRowCount(0)
+        self.sku_model.set_rows([])
         QMessageBox.information(self, "Session", "Session cleared successfully!")
 
     # ------------------------ Table Helpers ------------------------
     def add_to_table(self, timestamp, sku):
-        row = self.sku_table.rowCount()
-        self.sku_table.insertRow(row)
-        self.sku_table.setItem(row, 0, QTableWidgetItem(timestamp))
-        self.sku_table.setItem(row, 1, QTableWidgetItem(sku))
+        self.sku_model.append(timestamp, sku)
 
     # ------------------------ Helpers ------------------------
     def play_sound(self, success=True):
         def beep():
             try:
-                if platform.system() == "Windows":
+                if _IS_WINDOWS:
                     import winsound
                     freq, dur = (1000, 150) if success else (400, 300)
                     winsound.Beep(freq, dur)
@@ -634,42 +1062,44 @@ class BarcodeApp(QMainWindow):
     def save_settings(self):
         self.settings["beep_enabled"] = self.beep_checkbox.isChecked()
         self.settings["theme"] = self.theme_combo.currentText()
+        self.settings["symbology"] = self.symbology_combo.currentText()
+        self.settings["jpeg_quality"] = self.jpeg_quality_spin.value()
+        self.settings["mjpg_enabled"] = self.mjpg_checkbox.isChecked()
+        self.settings["camera_fps"] = self.fps_spin.value()
         try:
             with open(self.settings_file, 'w') as f:
                 json.dump(self.settings, f)
         except Exception:
             pass
+        self._update_zbar_symbols()
         self.set_stylesheet()
         QMessageBox.information(self, "Settings", "Settings saved successfully!")
 
     def set_stylesheet(self):
         theme = self.settings.get("theme", "Dark")
-        if theme == "Dark":
-            self.setStyleSheet("""
-                QWidget { background-color: #121212; color: white; }
-                QPushButton { font-size: 14px; padding: 6px; border-radius: 5px; }
-                QLabel, QComboBox, QLineEdit { color: white; font-size: 16px; }
-                QTableWidget { background-color: #1e1e1e; color: white; gridline-color: gray; }
-            """)
-        else:
-            self.setStyleSheet("""
-                QWidget { background-color: white; color: black; }
-                QPushButton { font-size: 14px; padding: 6px; border-radius: 5px; }
-                QLabel, QComboBox, QLineEdit { color: black; font-size: 16px; }
-                QTableWidget { background-color: #f0f0f0; color: black; gridline-color: gray; }
-            """)
+        if theme == self._current_theme:
+            return  # setStyleSheet restyles every child widget, skip no-op saves
+        self._current_theme = theme
+        self.setStyleSheet(self._DARK_QSS if theme == "Dark" else self._LIGHT_QSS)
+
+    def _update_zbar_symbols(self):
+        from pyzbar.pyzbar import ZBarSymbol
+        names = SYMBOLOGY_PRESETS.get(self.settings.get("symbology", "All"), SYMBOLOGY_PRESETS["All"])
+        self._zbar_symbols = [getattr(ZBarSymbol, name) for name in names]
+        # the native detector runs first, so skip it when the preset has no
+        # symbology it can read
+        self._native_symbols = set(names) & set(NATIVE_TO_ZBAR.values())
 
     def load_existing_barcodes(self, order_number):
         self.barcode_set.clear()
         log_path = os.path.join(self.save_location, order_number, "barcode_log.csv")
         if os.path.exists(log_path):
             try:
-                df = pd.read_csv(log_path)
-                self.barcode_set.update(df['SKU'].astype(str).tolist())
-                # Populate table
-                self.sku_table.setRowCount(0)
-                for i, row in df.iterrows():
-                    self.add_to_table(row['Timestamp'], row['SKU'])
+                with open(log_path, newline="") as f:
+                    rows = [(row["Timestamp"], row["SKU"]) for row in csv.DictReader(f)]
+                self.barcode_set.update(sku for _, sku in rows)
+                # Populate table with a single model reset
+                self.sku_model.set_rows(rows)
             except Exception:
                 pass
 
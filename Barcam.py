@@ -7,19 +7,174 @@ import numpy as np
 import serial.tools.list_ports
 import platform
 import threading
-import pandas as pd
+import queue
+import csv
 import json
 import subprocess
+import math
+import struct
+import tempfile
+import wave
 
 from PyQt5.QtWidgets import (
     QApplication, QLabel, QPushButton, QVBoxLayout, QWidget, QFileDialog,
     QComboBox, QMessageBox, QMainWindow, QLineEdit, QTabWidget, QCheckBox,
     QHBoxLayout
 )
-from PyQt5.QtCore import QTimer, Qt
+from PyQt5.QtCore import QTimer, Qt, pyqtSignal, QThread
 from PyQt5.QtGui import QImage, QPixmap
-from pyzbar.pyzbar import decode
+try:
+    from PyQt5 import sip
+except ImportError:
+    # PyQt5 < 5.11 ships sip as a top-level module
+    import sip
+from pyzbar.pyzbar import decode, ZBarSymbol
+
+# pyzbar runs on a grayscale copy shrunk by this factor; results are
+# scaled back up for drawing on the full-size frame
+DECODE_SCALE = 2
+# Frames whose 64x36 thumbnail differs from the previous one by less than
+# this mean absolute difference skip decoding and reuse the last result
+MOTION_THRESHOLD = 2.0
+# ...but decode at least every Nth tick anyway as a safety net
+FORCE_DECODE_EVERY = 10
+# After a detection only the area around it is decoded; scan the whole
+# frame again every Nth tick to pick up new codes elsewhere
+ROI_FULL_SCAN_EVERY = 15
+# JPEG quality for saved snapshots; ~2x faster and smaller than imwrite's 95
+JPEG_QUALITY = 85
+# "Expected symbology" presets in the Settings tab -> ZBarSymbol members.
+# zbar makes a pass per enabled symbology, so decoding only what the
+# workflow uses cuts its work proportionally. None is pyzbar's default of
+# every symbology zbar supports, as before presets existed.
+SYMBOLOGY_PRESETS = {
+    "All": None,
+    "EAN13 only": (ZBarSymbol.EAN13,),
+    "CODE128 only": (ZBarSymbol.CODE128,),
+    "QR only": (ZBarSymbol.QRCODE,),
+}
+
+
+def write_beep_wav(path, freq=1000, duration=0.15, rate=8000):
+    """Write a mono 16-bit sine tone to `path` as a WAV file."""
+    frames = b"".join(
+        struct.pack("<h", int(12000 * math.sin(2 * math.pi * freq * i / rate)))
+        for i in range(int(rate * duration)))
+    with wave.open(path, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(frames)
+
+
+class VideoCaptureThreading:
+    """
+    cv2.VideoCapture that reads frames on a background thread into a single
+    slot, so the GUI timer only pays for decode and drawing and always gets
+    the newest frame instead of waiting on the camera.
+    The thread grab()s every frame to keep the driver queue drained but only
+    retrieve()s (decodes) one after read() has asked for it, so frames the
+    GUI never shows are never decoded.
+    """
+    def __init__(self, src=0, width=1280, height=720):
+        self.cap = cv2.VideoCapture(src)
+        # MJPG before the size: UVC cams default to YUYV, which caps 720p at
+        # ~10 FPS on USB 2.0; compressed frames let them run at 30 FPS
+        self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*"MJPG"))
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        self.grabbed, self.frame = False, None
+        self.new_frame = False  # frame not yet returned by read()
+        self.started = False
+        self.read_lock = threading.Lock()
+        self.frame_wanted = threading.Event()
+        self.frame_wanted.set()
+        self.thread = None
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def start(self):
+        if self.started:
+            return self
+        self.started = True
+        self.thread = threading.Thread(target=self.update, daemon=True)
+        self.thread.start()
+        return self
+
+    def update(self):
+        while self.started:
+            if not self.cap.grab():
+                with self.read_lock:
+                    self.grabbed = False
+                time.sleep(0.01)
+                continue
+            if not self.frame_wanted.is_set():
+                continue
+            grabbed, frame = self.cap.retrieve()
+            with self.read_lock:
+                self.grabbed = grabbed
+                self.frame = frame
+                self.new_frame = grabbed
+            if grabbed:
+                self.frame_wanted.clear()
+
+    def read(self, new_only=False):
+        # the next grabbed frame gets decoded for the following call
+        self.frame_wanted.set()
+        with self.read_lock:
+            if not self.grabbed or self.frame is None:
+                return False, None
+            if new_only and not self.new_frame:
+                # the GUI timer outpaces the camera; nothing new to show
+                return False, None
+            self.new_frame = False
+            return True, self.frame.copy()
+
+    def stop(self):
+        self.started = False
+        if self.thread:
+            self.thread.join()
+            self.thread = None
+
+    def release(self):
+        self.stop()
+        self.cap.release()
+
+
+class CameraProber(QThread):
+    """
+    Probes camera indices off the GUI thread; each VideoCapture open can
+    block for seconds in the driver. Emits camera_found(index, name, key)
+    for every index that opens; `key` is the name-cache key ("" if none) so
+    the GUI thread can merge new names into its cache.
+    """
+    camera_found = pyqtSignal(int, str, str)
+
+    def __init__(self, name_fn, name_cache, max_test=10, parent=None):
+        super().__init__(parent)
+        self.name_fn = name_fn
+        # private copy: the GUI thread owns (and persists) the real cache
+        self.name_cache = dict(name_cache)
+        self.max_test = max_test
+
+    def run(self):
+        for index in range(self.max_test):
+            if self.isInterruptionRequested():
+                break
+            cap = cv2.VideoCapture(index)
+            if cap.isOpened():
+                cap.release()
+                key, name = self.name_fn(index, self.name_cache)
+                self.camera_found.emit(index, name, key)
+
+
 class BarcodeApp(QMainWindow):
+    # (barcodes, frame_id, frame) from the decode worker thread
+    decoded = pyqtSignal(list, int, object)
+    # error message from the snapshot writer thread
+    save_failed = pyqtSignal(str)
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Barcode Inspector")
@@ -30,6 +185,7 @@ class BarcodeApp(QMainWindow):
 
         self.init_ui()
         self.populate_serial_ports()
+        self._camera_prober = None
         self.populate_camera_indices()
 
         self.capture = None
@@ -39,8 +195,50 @@ class BarcodeApp(QMainWindow):
 
         self.last_barcode = None
         self.barcode_set = set()
+        self._scanned_count = 0  # value shown in count_label
+        self._seen_log_path = None  # order log barcode_set was seeded from
+        self._prev_small = None  # previous motion-gate thumbnail
+        self._roi = None  # (x1, y1, x2, y2) in decode coordinates, or None
+        self._roi_misses = 0
+        self._last_barcodes = []  # latest decode result, drawn on every frame
+        self._tick = 0
+        self._frame_id = 0
+        # display and decode buffers reused every frame (sized in start_camera)
+        self._rgb_buf = None
+        self._qimage = None
+        self._gray_buf = None
+        self._small_buf = None
+
+        # pyzbar runs on a worker thread fed through a one-slot queue that
+        # always holds the newest frame; results come back via `decoded`
+        self._decode_q = queue.Queue(maxsize=1)
+        self._decode_thread = None
+        self._running = False
+        self.decoded.connect(self._on_decoded)
+        self.save_failed.connect(self.show_error)
         self.save_location = ""
         self.serial_port = None
+        self._log_fh = None  # barcode_log.csv, open while scanning
+
+        # Beeps are played by one long-lived thread from a tone rendered once
+        self._beep_path = None
+        if platform.system() != "Windows":
+            # private file: a fixed name in the shared temp dir could be
+            # pre-created or swapped by another user
+            try:
+                fd, path = tempfile.mkstemp(suffix=".wav", prefix="barcam_beep_")
+                os.close(fd)
+                write_beep_wav(path)
+                self._beep_path = path
+            except OSError:
+                # _beep_loop falls back to sox synthesising the tone
+                pass
+        self._beep_sem = threading.Semaphore(0)
+        threading.Thread(target=self._beep_loop, daemon=True).start()
+
+        # JPEG encoding and disk writes for snapshots happen on this thread
+        self._save_q = queue.Queue()
+        threading.Thread(target=self._save_loop, daemon=True).start()
 
         self.set_stylesheet()
 
@@ -98,6 +296,12 @@ class BarcodeApp(QMainWindow):
         settings_layout.addWidget(QLabel("Theme:"))
         settings_layout.addWidget(self.theme_combo)
 
+        self.symbology_combo = QComboBox()
+        self.symbology_combo.addItems(list(SYMBOLOGY_PRESETS))
+        self.symbology_combo.setCurrentText(self.settings.get("symbology", "All"))
+        settings_layout.addWidget(QLabel("Expected symbology:"))
+        settings_layout.addWidget(self.symbology_combo)
+
         self.save_settings_button = QPushButton("Save Settings")
         settings_layout.addWidget(self.save_settings_button)
 
@@ -121,36 +325,85 @@ class BarcodeApp(QMainWindow):
         for port in ports:
             self.serial_port_combo.addItem(port.device)
 
-    def get_camera_name(self, index):
+    @staticmethod
+    def get_camera_name(index, cache):
+        """
+        Return (cache key, label) for camera `index`. Only reads `cache`;
+        runs on the prober thread, so the caller stores new entries.
+        """
         # Linux only: try getting camera name via v4l2-ctl
         dev = f"/dev/video{index}"
-        if os.path.exists(dev):
-            try:
-                result = subprocess.check_output(["v4l2-ctl", "-d", dev, "--info"]).decode()
-                for line in result.splitlines():
-                    if "Driver name" in line:
-                        return f"{index} - {line.strip()}"
-            except Exception:
-                pass
-        return f"{index} - Camera"
+        try:
+            ctime = int(os.stat(dev).st_ctime)
+        except OSError:
+            return "", f"{index} - Camera"
+        # v4l2-ctl costs a fork+exec per device; cache by the node's ctime,
+        # which udev resets whenever it recreates the node for a replugged
+        # (possibly different) camera. st_rdev would not change: videoN
+        # numbers are reused with the same major/minor.
+        key = f"{dev}:{ctime}"
+        name = cache.get(key)
+        if name is not None:
+            return key, name
+        name = f"{index} - Camera"
+        try:
+            result = subprocess.check_output(["v4l2-ctl", "-d", dev, "--info"]).decode()
+            for line in result.splitlines():
+                if "Driver name" in line:
+                    name = f"{index} - {line.strip()}"
+                    break
+        except Exception:
+            pass
+        return key, name
 
     def populate_camera_indices(self, max_test=10):
+        # a probe already in flight will refill the combo itself
+        if self._camera_prober and self._camera_prober.isRunning():
+            return
         self.camera_combo.clear()
-        for index in range(max_test):
-            cap = cv2.VideoCapture(index)
-            if cap.isOpened():
-                name = self.get_camera_name(index)
-                self.camera_combo.addItem(name)
-                cap.release()
+        self._camera_prober = CameraProber(self.get_camera_name, self._cam_name_cache,
+                                           max_test, self)
+        self._camera_prober.camera_found.connect(self._on_camera_found)
+        self._camera_prober.finished.connect(self._on_camera_probe_finished)
+        self._camera_prober.start()
+
+    def _on_camera_found(self, index, name, key):
+        self.camera_combo.addItem(name)
+        if key and self._cam_name_cache.get(key) != name:
+            self._cam_name_cache[key] = name
+            self._cam_names_dirty = True
+
+    def _on_camera_probe_finished(self):
+        # persist newly looked-up camera names so the next launch skips v4l2-ctl
+        if self._cam_names_dirty:
+            self._cam_names_dirty = False
+            try:
+                self._write_settings()
+            except OSError as e:
+                # only a cache; a read-only settings.json must not abort startup
+                self.show_error(f"Could not save camera names: {e}")
 
     def start_camera(self):
-        try:
-            self.serial_port = serial.Serial(self.serial_port_combo.currentText(), 9600, timeout=1)
-            self.status_label.setText("Connected to serial.")
-        except Exception as e:
-            self.show_error(f"Serial error: {e}")
+        if self.capture:
+            # already running: a second wrapper would leave the first grabber
+            # thread holding the device and start a second decode worker
             return
 
+        # opening a USB-serial adapter can take hundreds of ms (DTR reset), so
+        # keep the port open across camera restarts unless another is chosen
+        port_name = self.serial_port_combo.currentText()
+        if (self.serial_port is None or self.serial_port.port != port_name
+                or not self.serial_port.is_open):
+            if self.serial_port:
+                self.serial_port.close()
+                self.serial_port = None
+            try:
+                self.serial_port = serial.Serial(port_name, 9600, timeout=1)
+            except Exception as e:
+                self.show_error(f"Serial error: {e}")
+                return
+        self.status_label.setText("Connected to serial.")
+
         try:
             selected_text = self.camera_combo.currentText()
             self.camera_index = int(selected_text.split(" - ")[0])
@@ -158,96 +411,306 @@ class BarcodeApp(QMainWindow):
             self.show_error("Invalid camera index.")
             return
 
-        self.capture = cv2.VideoCapture(self.camera_index)
-        self.capture.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
-        self.capture.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
+        capture = VideoCaptureThreading(self.camera_index, 1280, 720)
 
-        if not self.capture.isOpened():
+        if not capture.isOpened():
+            # leave self.capture unset so the next Start tries again
+            capture.release()
             self.show_error("Failed to open camera.")
             return
-
-        self.timer.start(30)
+        self.capture = capture
+
+        if self.save_location:
+            self._load_seen_barcodes(self._order_log_path())
+        self._alloc_display_buffers(720, 1280)
+        self._alloc_decode_buffers(720, 1280)
+        self.capture.start()
+        self._running = True
+        self._decode_thread = threading.Thread(target=self._decode_loop, daemon=True)
+        self._decode_thread.start()
+        # decoding no longer blocks the timer, so render at ~60 Hz
+        self.timer.start(16)
+
+    def _order_log_path(self):
+        order_number = self.order_input.text().strip() or "NoOrder"
+        return os.path.join(self.save_location, order_number, "barcode_log.csv")
+
+    def _load_seen_barcodes(self, log_path):
+        """
+        Reset barcode_set to the codes in the given order log, so a restart
+        doesn't re-photograph codes that were already scanned and switching
+        orders mid-session doesn't skip codes seen under the previous one.
+        """
+        self.barcode_set.clear()
+        self._seen_log_path = log_path
+        try:
+            with open(log_path) as f:
+                for line in f:
+                    _, _, value = line.rstrip("\n").partition(",")
+                    if value:
+                        self.barcode_set.add(value)
+        except OSError:
+            pass
+        self._update_count_label()
 
     def stop_camera(self):
         self.timer.stop()
+        if self._decode_thread:
+            self._running = False
+            try:
+                self._decode_q.get_nowait()
+            except queue.Empty:
+                pass
+            self._decode_q.put(None)
+            self._decode_thread.join()
+            self._decode_thread = None
+            # drop the stop marker if the worker exited before reading it
+            try:
+                self._decode_q.get_nowait()
+            except queue.Empty:
+                pass
         if self.capture:
+            # joins the grabber thread before releasing the device
             self.capture.release()
-        if self.serial_port:
-            self.serial_port.close()
+            self.capture = None
+        if self._log_fh:
+            self._log_fh.close()
+            self._log_fh = None
+        self._save_q.join()  # let pending snapshots reach the disk
         self.image_label.setText("Camera Feed")
         self.barcode_label.setText("Current Barcode: None")
         self.count_label.setText("Barcodes Scanned: 0")
+        self._scanned_count = 0
         self.barcode_set.clear()
+        self._seen_log_path = None
         self.last_barcode = None
+        self._prev_small = None
+        self._roi = None
+        self._roi_misses = 0
+        self._last_barcodes = []
         self.status_label.setText("Status: Disconnected")
 
+    def closeEvent(self, event):
+        if self._camera_prober:
+            # stop after the index being opened instead of probing them all
+            self._camera_prober.requestInterruption()
+            self._camera_prober.wait()
+        self.stop_camera()
+        if self.serial_port:
+            self.serial_port.close()
+            self.serial_port = None
+        if self._beep_path:
+            try:
+                os.remove(self._beep_path)
+            except OSError:
+                pass
+            self._beep_path = None
+        super().closeEvent(event)
+
     def select_folder(self):
         folder = QFileDialog.getExistingDirectory(self, "Select Save Folder")
         if folder:
             self.save_location = folder
 
     def update_frame(self):
-        ret, frame = self.capture.read()
+        ret, frame = self.capture.read(new_only=True)
         if not ret:
             return
 
-        barcodes = decode(frame)
-        current_barcode = None
+        # hand the newest frame to the decode worker, replacing any frame it
+        # hasn't picked up yet
+        self._frame_id += 1
+        try:
+            self._decode_q.get_nowait()
+        except queue.Empty:
+            pass
+        self._decode_q.put_nowait((self._frame_id, frame.copy()))
+
+        self._draw_barcodes(frame, self._last_barcodes)
+
+        if self._rgb_buf is None or self._rgb_buf.shape != frame.shape:
+            # camera delivered a different size than requested
+            self._alloc_display_buffers(*frame.shape[:2])
+        cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=self._rgb_buf)
+        scaled_image = QPixmap.fromImage(self._qimage).scaled(
+            self.image_label.width(), self.image_label.height(),
+            Qt.KeepAspectRatio, Qt.FastTransformation)
+        self.image_label.setPixmap(scaled_image)
+
+    def _alloc_display_buffers(self, h, w):
+        # the QImage wraps _rgb_buf without copying; keeping both on self
+        # stops the array being freed underneath Qt. A raw sip.voidptr to the
+        # array's memory skips the buffer-protocol round-trip of ndarray.data
+        self._rgb_buf = np.empty((h, w, 3), dtype=np.uint8)
+        self._qimage = QImage(sip.voidptr(self._rgb_buf.ctypes.data), w, h, 3 * w,
+                              QImage.Format_RGB888)
+
+    def _alloc_decode_buffers(self, h, w):
+        # grayscale frame and its downscaled copy, reused by the decode worker
+        self._gray_buf = np.empty((h, w), np.uint8)
+        self._small_buf = np.empty((h // DECODE_SCALE, w // DECODE_SCALE), np.uint8)
+
+    def _decode_loop(self):
+        while self._running:
+            item = self._decode_q.get()
+            if item is None:
+                break
+            frame_id, frame = item
+            try:
+                barcodes = self._decode_frame(frame)
+            except Exception:
+                continue
+            if barcodes is not None:
+                self.decoded.emit(barcodes, frame_id, frame)
+
+    def _decode_frame(self, frame):
+        """
+        Decode one frame on the worker thread.
+        Returns None when the motion gate decides the last result still holds.
+        """
+        if self._gray_buf is None or self._gray_buf.shape != frame.shape[:2]:
+            # camera delivered a different size than requested
+            self._alloc_decode_buffers(*frame.shape[:2])
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=self._gray_buf)
+
+        # motion gate: a static scene decodes to the same result as last time
+        thumb = cv2.resize(gray, (64, 36), interpolation=cv2.INTER_AREA)
+        still = (self._prev_small is not None
+                 and cv2.absdiff(thumb, self._prev_small).mean() < MOTION_THRESHOLD)
+        self._prev_small = thumb
+        self._tick += 1
+        if still and self._tick % FORCE_DECODE_EVERY:
+            return None
+
+        # decode on a downscaled grayscale copy (1/12 of the bytes)
+        small_h, small_w = self._small_buf.shape
+        small = cv2.resize(gray, (small_w, small_h), dst=self._small_buf,
+                           interpolation=cv2.INTER_AREA)
+
+        if self._roi is not None and self._tick % ROI_FULL_SCAN_EVERY:
+            # only look where the last codes were
+            x1, y1, x2, y2 = self._roi
+            barcodes = [self._offset_barcode(b, x1, y1)
+                        for b in decode(small[y1:y2, x1:x2], symbols=self._zbar_symbols)]
+            if not barcodes:
+                # tracking lost twice in a row: go back to full-frame search
+                self._roi_misses += 1
+                if self._roi_misses >= 2:
+                    self._roi = None
+                return barcodes
+        else:
+            barcodes = decode(small, symbols=self._zbar_symbols)
+
+        self._roi_misses = 0
+        self._roi = self._track_roi(barcodes, small.shape) if barcodes else None
+        return barcodes
+
+    @staticmethod
+    def _offset_barcode(barcode, dx, dy):
+        # map a result decoded from a ROI patch back to decode coordinates
+        rect = barcode.rect
+        return barcode._replace(
+            rect=rect._replace(left=rect.left + dx, top=rect.top + dy),
+            polygon=[p._replace(x=p.x + dx, y=p.y + dy) for p in barcode.polygon])
+
+    @staticmethod
+    def _track_roi(barcodes, shape):
+        # union of the detected rects, padded by 1/8 of its larger side
+        x1 = min(b.rect.left for b in barcodes)
+        y1 = min(b.rect.top for b in barcodes)
+        x2 = max(b.rect.left + b.rect.width for b in barcodes)
+        y2 = max(b.rect.top + b.rect.height for b in barcodes)
+        pad = max(x2 - x1, y2 - y1) // 8
+        h, w = shape[:2]
+        return max(0, x1 - pad), max(0, y1 - pad), min(w, x2 + pad), min(h, y2 + pad)
+
+    def _on_decoded(self, barcodes, frame_id, frame):
+        if not self._running:
+            return  # queued before stop_camera
+        self._last_barcodes = barcodes
+        # outline the codes on the decoded frame so snapshots show them
+        self._draw_barcodes(frame, barcodes)
 
+        current_barcode = None
         for barcode in barcodes:
-            barcode_data = barcode.data.decode("utf-8")
-            current_barcode = barcode_data
+            current_barcode = barcode.data.decode("utf-8")
+            if current_barcode != self.last_barcode:
+                self.last_barcode = current_barcode
+                self.capture_image(frame, current_barcode)
 
+        if current_barcode:
+            self.barcode_label.setText(f"Current Barcode: {current_barcode}")
+
+    def _draw_barcodes(self, frame, barcodes):
+        for barcode in barcodes:
             points = barcode.polygon
+            rect = [v * DECODE_SCALE for v in barcode.rect]
             if len(points) == 4:
-                pts = [tuple(point) for point in points]
-                cv2.polylines(frame, [np.array(pts, dtype=np.int32)], True, (0, 255, 0), 3)
+                pts = np.array(points, dtype=np.int32)
+                pts *= DECODE_SCALE
+                cv2.polylines(frame, [pts], True, (0, 255, 0), 3)
             else:
-                rect = barcode.rect
                 cv2.rectangle(frame, (rect[0], rect[1]),
                               (rect[0] + rect[2], rect[1] + rect[3]), (0, 255, 0), 3)
 
-            cv2.putText(frame, current_barcode, (barcode.rect[0], barcode.rect[1] - 10),
+            cv2.putText(frame, barcode.data.decode("utf-8"), (rect[0], rect[1] - 10),
                         cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 0, 0), 2)
 
-            if current_barcode != self.last_barcode:
-                self.last_barcode = current_barcode
-                self.capture_image(frame, current_barcode)
-
-        if current_barcode:
-            self.barcode_label.setText(f"Current Barcode: {current_barcode}")
-
-        rgb_image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        h, w, ch = rgb_image.shape
-        bytes_per_line = ch * w
-        qt_image = QImage(rgb_image.data, w, h, bytes_per_line, QImage.Format_RGB888)
-        scaled_image = QPixmap.fromImage(qt_image).scaled(
-            self.image_label.width(), self.image_label.height(),
-            Qt.KeepAspectRatio, Qt.SmoothTransformation)
-        self.image_label.setPixmap(scaled_image)
-
     def capture_image(self, frame, barcode_value):
         if not self.save_location:
             self.show_error("No save location selected!")
             return
 
-        order_number = self.order_input.text().strip() or "NoOrder"
-        order_folder = os.path.join(self.save_location, order_number)
+        log_path = self._order_log_path()
+        if log_path != self._seen_log_path:
+            # order number (or folder) changed since barcode_set was seeded
+            self._load_seen_barcodes(log_path)
+        # a code already logged this order needs no second image or log row
+        if barcode_value in self.barcode_set and barcode_value != "manual":
+            return
+
+        order_folder = os.path.dirname(log_path)
         os.makedirs(order_folder, exist_ok=True)
 
         timestamp = time.strftime("%Y%m%d-%H%M%S")
         filename = os.path.join(order_folder, f"barcode_{barcode_value}_{timestamp}.jpg")
-        cv2.imwrite(filename, frame)
+        self._save_q.put((filename, frame))
 
         if self.beep_checkbox.isChecked():
             self.play_sound()
 
-        log_path = os.path.join(order_folder, "barcode_log.csv")
-        with open(log_path, "a") as f:
-            f.write(f"{timestamp},{barcode_value}\n")
+        # keep the log open for the session instead of open/append/close per scan
+        if self._log_fh is None or self._log_fh.name != log_path:
+            if self._log_fh:
+                self._log_fh.close()
+            self._log_fh = open(log_path, "a", buffering=8192)
+        self._log_fh.write(f"{timestamp},{barcode_value}\n")
+        self._log_fh.flush()
 
         self.barcode_set.add(barcode_value)
-        self.count_label.setText(f"Barcodes Scanned: {len(self.barcode_set)}")
+        self._update_count_label()
+
+    def _update_count_label(self):
+        # only touch the QLabel (and trigger a repaint) when the count moved
+        new = len(self.barcode_set)
+        if new != self._scanned_count:
+            self._scanned_count = new
+            self.count_label.setText(f"Barcodes Scanned: {new}")
+
+    def _save_loop(self):
+        while True:
+            filename, frame = self._save_q.get()
+            try:
+                ok, buf = cv2.imencode(".jpg", frame, [int(cv2.IMWRITE_JPEG_QUALITY), JPEG_QUALITY])
+                if not ok:
+                    raise ValueError("JPEG encoding failed")
+                # binary mode: a text-mode fd on Windows would expand 0x0A to CRLF
+                with open(filename, "wb") as f:
+                    f.write(buf)
+            except Exception as e:
+                self.save_failed.emit(f"Failed to write image {filename}: {e}")
+            finally:
+                self._save_q.task_done()
 
     def capture_snapshot(self):
         if self.capture:
@@ -263,22 +726,61 @@ class BarcodeApp(QMainWindow):
         order_number = self.order_input.text().strip() or "NoOrder"
         log_path = os.path.join(self.save_location, order_number, "barcode_log.csv")
         if os.path.exists(log_path):
-            df = pd.read_csv(log_path)
             excel_path = os.path.join(self.save_location, order_number, "barcode_log.xlsx")
-            df.to_excel(excel_path, index=False)
+            try:
+                import openpyxl  # deferred: only needed for export
+            except ImportError:
+                self.show_error("Excel export needs openpyxl (see Requirements.txt)")
+                return
+            try:
+                # write_only streams rows to disk instead of building the sheet in memory
+                wb = openpyxl.Workbook(write_only=True)
+                ws = wb.create_sheet()
+                # barcode_log.csv has no header line
+                ws.append(["Timestamp", "Barcode"])
+                with open(log_path, newline="") as f:
+                    for row in csv.reader(f):
+                        ws.append(row)
+                wb.save(excel_path)
+            except Exception as e:
+                self.show_error(f"Failed to export to Excel: {e}")
+                return
             QMessageBox.information(self, "Export", f"Log exported to {excel_path}")
         else:
             self.show_error("No barcode log to export")
 
     def play_sound(self):
-        def beep():
-            if platform.system() == "Windows":
-                import winsound
-                winsound.Beep(1000, 150)
-            else:
-                os.system("play -nq -t alsa synth 0.15 sine 1000")
+        # wake the beep thread; it plays one tone per release
+        self._beep_sem.release()
 
-        threading.Thread(target=beep).start()
+    def _beep_loop(self):
+        while True:
+            self._beep_sem.acquire()
+            try:
+                self._play_beep()
+            except Exception:
+                # e.g. no sound device; losing one beep must not end this thread
+                pass
+
+    def _play_beep(self):
+        if platform.system() == "Windows":
+            import winsound
+            winsound.Beep(1000, 150)
+            return
+        # play the pre-rendered tone instead of a shell + sox synth per beep;
+        # sox's `play` is the fallback where neither player exists (macOS)
+        commands = [["play", "-nq", "synth", "0.15", "sine", "1000"]]
+        if self._beep_path:
+            commands[:0] = [["paplay", self._beep_path], ["aplay", "-q", self._beep_path]]
+        for cmd in commands:
+            try:
+                proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL,
+                                        stderr=subprocess.DEVNULL)
+            except OSError:
+                continue
+            # reap the player here; also keeps beeps from overlapping
+            proc.wait()
+            break
 
     def show_error(self, message):
         QMessageBox.critical(self, "Error", message)
@@ -289,12 +791,27 @@ class BarcodeApp(QMainWindow):
                 self.settings = json.load(f)
         else:
             self.settings = {}
+        # "/dev/videoN:<st_ctime>" -> combo label, filled by _on_camera_found
+        self._cam_name_cache = self.settings.get("camera_names", {})
+        self._cam_names_dirty = False
+        self._update_zbar_symbols()
+
+    def _update_zbar_symbols(self):
+        preset = self.settings.get("symbology", "All")
+        symbols = SYMBOLOGY_PRESETS.get(preset)
+        self._zbar_symbols = list(symbols) if symbols else None
+
+    def _write_settings(self):
+        self.settings["camera_names"] = self._cam_name_cache
+        with open(self.settings_file, 'w') as f:
+            json.dump(self.settings, f)
 
     def save_settings(self):
         self.settings["beep_enabled"] = self.beep_checkbox.isChecked()
         self.settings["theme"] = self.theme_combo.currentText()
-        with open(self.settings_file, 'w') as f:
-            json.dump(self.settings, f)
+        self.settings["symbology"] = self.symbology_combo.currentText()
+        self._write_settings()
+        self._update_zbar_symbols()
         self.set_stylesheet()
         QMessageBox.information(self, "Settings", "Settings saved successfully!")
 